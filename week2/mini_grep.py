@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # mini_grep.py
-# Final version: color highlight, include/exclude, max-bytes, multithread, follow -f, context A/B.
-import argparse, re, sys, time, os, threading
+# Final version: color highlight, include/exclude, max-bytes, multithread, follow -f, context A/B, result cache.
+import argparse, re, sys, time, os, threading, json, hashlib, codecs
 from pathlib import Path
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -122,6 +122,174 @@ def grep_path(path, pat: re.Pattern, before: int, after: int, encoding: str, hig
     except (OSError, UnicodeError) as e:
         ts_print(f"[ERROR] Mở {p} thất bại: {e}", file=sys.stderr)
 
+# ---------- Result cache (--cache DIR) ----------
+# Mỗi entry là 1 file JSON: fingerprint của file (size, mtime, inode) + [offset, độ dài] byte của các dòng match.
+# File chỉ append thêm (cùng inode, size tăng, đoạn cuối đã quét không đổi) -> quét tiếp từ offset cũ.
+# LRU: mtime của entry được cập nhật mỗi lần dùng, evict entry cũ nhất khi vượt --cache-max-bytes.
+# Chỉ file có tên mgc-<sha1>.json / .tmp mới bị evict, không đụng file khác trong DIR.
+_TAIL_CHECK = 4096  # số byte ngay trước offset đã quét, dùng để kiểm tra file chỉ bị append
+_ENTRY_RE = re.compile(r"mgc-[0-9a-f]{40}\.json")
+_TMP_RE = re.compile(r"mgc-[0-9a-f]{40}\.\d+\.\d+\.tmp")
+_TMP_MAX_AGE = 3600  # giây; .tmp cũ hơn là do store() bị ngắt giữa chừng
+_CACHE_VERSION = 2  # tăng khi đổi format entry -> entry cũ bị coi là miss
+_ENTRY_INT_FIELDS = ("size", "mtime_ns", "ino", "scanned")
+
+class ResultCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = self.partial = self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, p: Path, pat: re.Pattern, encoding: str) -> Path:
+        key = json.dumps([str(p.resolve()), pat.pattern, pat.flags, encoding])
+        return self.dir / f"mgc-{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _count(self, kind: str):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def load(self, p: Path, pat: re.Pattern, encoding: str):
+        ep = self._entry_path(p, pat, encoding)
+        try:
+            with ep.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(ep)  # đánh dấu vừa dùng (LRU)
+        except (OSError, ValueError):
+            return ep, None
+        return ep, (entry if _valid_entry(entry) else None)
+
+    def store(self, ep: Path, entry: dict):
+        tmp = ep.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, ep)
+        except OSError as e:
+            ts_print(f"[WARN] Ghi cache {ep} thất bại: {e}", file=sys.stderr)
+
+    def evict(self):
+        entries = []
+        now = time.time()
+        for x in self.dir.glob("mgc-*"):
+            try:
+                if _TMP_RE.fullmatch(x.name):
+                    if now - x.stat().st_mtime > _TMP_MAX_AGE:
+                        x.unlink()
+                elif _ENTRY_RE.fullmatch(x.name):
+                    st = x.stat()
+                    entries.append((st.st_mtime, st.st_size, x))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, x in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                x.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def report(self):
+        ts_print(f"[CACHE] hit={self.hits} partial={self.partial} miss={self.misses}", file=sys.stderr)
+
+_EOL = re.compile(rb"\r\n|\r|\n")
+
+def _split_lines(raw: bytes):
+    # tách như text mode (universal newlines): trả về (offset trong raw, nội dung, độ dài xuống dòng, cache được)
+    # "\r" ở cuối file có thể là nửa đầu của "\r\n" sẽ được ghi tiếp -> match như text mode nhưng không cache
+    start = 0
+    for m in _EOL.finditer(raw):
+        yield start, raw[start:m.start()], len(m.group()), not (m.group() == b"\r" and m.end() == len(raw))
+        start = m.end()
+    if start < len(raw):
+        yield start, raw[start:], 0, False
+
+def cache_encoding_ok(encoding: str) -> bool:
+    # cache tách dòng trên bytes -> chỉ dùng được với encoding mà "\r", "\n" là 1 byte ASCII
+    try:
+        name = codecs.lookup(encoding).name
+        return ("\r\n".encode(encoding) == b"\r\n"
+                and not name.startswith(("utf-16", "utf-32")))
+    except (LookupError, UnicodeError):
+        return False
+
+def _is_int(x) -> bool:
+    return isinstance(x, int) and not isinstance(x, bool)
+
+def _valid_entry(entry) -> bool:
+    # entry hỏng / format cũ -> coi như miss, lần quét sau sẽ ghi đè
+    return (isinstance(entry, dict)
+            and entry.get("version") == _CACHE_VERSION
+            and all(_is_int(entry.get(k)) and entry[k] >= 0 for k in _ENTRY_INT_FIELDS)
+            and isinstance(entry.get("tail"), str)
+            and isinstance(entry.get("matches"), list)
+            and all(isinstance(m, list) and len(m) == 2 and _is_int(m[0]) and _is_int(m[1])
+                    and m[0] >= 0 and m[1] >= 0 and m[0] + m[1] <= entry["scanned"]
+                    for m in entry["matches"]))
+
+def _tail_digest(fh, end: int) -> str:
+    start = max(0, end - _TAIL_CHECK)
+    fh.seek(start)
+    return hashlib.sha1(fh.read(end - start)).hexdigest()
+
+def grep_path_cached(path, pat: re.Pattern, encoding: str, highlight, cache: ResultCache):
+    p = Path(path)
+    try:
+        st = p.stat()
+        ep, entry = cache.load(p, pat, encoding)
+        with open(p, "rb") as fh:
+            status = "misses"
+            if entry and entry["ino"] == st.st_ino:
+                if entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                    status = "hits"
+                elif entry["size"] < st.st_size and _tail_digest(fh, entry["scanned"]) == entry["tail"]:
+                    # chỉ kiểm tra _TAIL_CHECK byte cuối: sửa file ở đoạn trước đó mà size tăng sẽ không bị phát hiện
+                    status = "partial"
+            cache._count(status)
+            matches, start = (entry["matches"], entry["scanned"]) if status != "misses" else ([], 0)
+
+            # in lại các match đã cache
+            for off, length in matches:
+                fh.seek(off)
+                line = fh.read(length).decode(encoding, errors="replace")
+                ts_print(f"{p}:", highlight(line))
+            if status == "hits" and start >= st.st_size:
+                return
+
+            # quét phần chưa có trong cache (toàn bộ file, phần mới append hoặc dòng cuối chưa có "\n")
+            fh.seek(start)
+            pos = start
+            for raw in fh:
+                base = pos
+                if raw.endswith(b"\n") and b"\r" not in raw:  # đường nhanh: dòng "\n" thông thường
+                    line = raw.decode(encoding, errors="replace")
+                    if pat.search(line) is not None:
+                        ts_print(f"{p}:", highlight(line[:-1]))
+                        matches.append([base, len(raw) - 1])
+                    pos += len(raw)
+                    continue
+                for rel, body, eol, complete in _split_lines(raw):
+                    line = body.decode(encoding, errors="replace")
+                    # giống grep_path: dòng có xuống dòng được match kèm "\n"
+                    if pat.search(line + "\n" if eol else line) is not None:
+                        ts_print(f"{p}:", highlight(line))
+                        if complete:
+                            matches.append([base + rel, len(body)])
+                    if complete:
+                        pos = base + rel + len(body) + eol
+            # dòng cuối chưa có "\n" (đang ghi dở) không được cache, lần sau quét lại
+            if status == "hits":
+                return
+            cache.store(ep, {
+                "version": _CACHE_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino,
+                "scanned": pos, "tail": _tail_digest(fh, pos), "matches": matches,
+            })
+    except (OSError, UnicodeError, LookupError) as e:
+        ts_print(f"[ERROR] Mở {p} thất bại: {e}", file=sys.stderr)
+
 def follow_file(p: Path, pat: re.Pattern, encoding: str, before: int, after: int, highlight):
     # tail -f đơn giản: nhảy cuối file và đọc phần append
     try:
@@ -177,6 +345,10 @@ def main():
                     help="Số threads quét song song nhiều file (mặc định = số CPU).")
     ap.add_argument("-f", "--follow", action="store_true",
                     help="Tail -f 1 file (chỉ dùng khi paths là đúng 1 file, không dùng stdin/thư mục).")
+    ap.add_argument("--cache", metavar="DIR",
+                    help="Cache kết quả match theo (file, size, mtime, inode, pattern, flags) trong DIR.")
+    ap.add_argument("--cache-max-bytes", type=int, default=64 * 1024 * 1024,
+                    help="Dung lượng tối đa của cache, evict LRU khi vượt (mặc định 64MB).")
 
     args = ap.parse_args()
 
@@ -189,6 +361,27 @@ def main():
 
     targets = list(iter_paths(args.paths, args.recursive, inc_exts, exc_exts, args.max_bytes))
 
+    # Cache chỉ lưu dòng match của file thường, không áp dụng cho context A/B, --follow, stdin
+    cache = None
+    if args.cache:
+        if args.cache_max_bytes <= 0:
+            sys.exit("[ERROR] --cache-max-bytes phải > 0.")
+        if args.follow:
+            ts_print("[WARN] --cache bị bỏ qua khi dùng --follow.", file=sys.stderr)
+        elif args.before or args.after:
+            ts_print("[WARN] --cache bị bỏ qua khi dùng -A/-B.", file=sys.stderr)
+        elif not cache_encoding_ok(args.encoding):
+            ts_print(f"[WARN] --cache bị bỏ qua với encoding {args.encoding} (chỉ hỗ trợ encoding tương thích ASCII).",
+                     file=sys.stderr)
+        else:
+            try:
+                cache = ResultCache(args.cache, args.cache_max_bytes)
+            except OSError as e:
+                sys.exit(f"[ERROR] Không tạo được thư mục cache {args.cache}: {e}")
+
+    if cache and "-" in targets:
+        ts_print("[WARN] --cache bị bỏ qua với stdin.", file=sys.stderr)
+
     # follow mode: only one file, not stdin
     if args.follow:
         if len(targets) != 1 or targets[0] == "-":
@@ -206,16 +399,26 @@ def main():
         grep_path("-", pat, args.before, args.after, args.encoding, highlight)
         targets = [t for t in targets if t != "-"]
 
+    def scan(p):
+        if cache:
+            grep_path_cached(p, pat, args.encoding, highlight, cache)
+        else:
+            grep_path(p, pat, args.before, args.after, args.encoding, highlight)
+
     # Multithread scan for multiple files
     workers = max(1, int(args.threads))
     if workers == 1 or len(targets) <= 1:
         for p in targets:
-            grep_path(p, pat, args.before, args.after, args.encoding, highlight)
+            scan(p)
     else:
         with ThreadPoolExecutor(max_workers=workers) as exe:
-            futs = [exe.submit(grep_path, p, pat, args.before, args.after, args.encoding, highlight) for p in targets]
+            futs = [exe.submit(scan, p) for p in targets]
             for _ in as_completed(futs):
                 pass  # output đã thread-safe qua ts_print
 
+    if cache:
+        cache.evict()
+        cache.report()
+
 if __name__ == "__main__":
     main()